@@ -5,13 +5,20 @@ A Flask-based chatbot application using Google's Gemini AI for conversational re
 Features streaming chat, persistent chat history, and RESTful API endpoints.
 """
 
-from flask import Flask, request, jsonify, Response, stream_with_context
+from flask import Flask, request, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 import google.generativeai as genai
+import cachetools
+import orjson
+import atexit
 import os
 import sqlite3
-import json
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 
 # Load environment variables from .env file
@@ -31,28 +38,481 @@ genai.configure(api_key=google_api_key)
 # Initialize Gemini AI model for conversational responses
 model = genai.GenerativeModel('gemini-2.0-flash-exp')
 
+# Gemini chat sessions kept per chat session_id, so follow-up messages carry context
+# without reloading the transcript from the database on every request. Each entry
+# records the newest message id it reflects, so changes made by other worker
+# processes are noticed; a per-session lock serializes requests sharing a chat.
+CHAT_CACHE_SIZE = 1024
+CHAT_HISTORY_MESSAGES = 20  # Most recent messages kept as model context
+_chats = cachetools.LRUCache(maxsize=CHAT_CACHE_SIZE)
+_chat_locks = weakref.WeakValueDictionary()
+_chats_lock = threading.Lock()
+
+# Longest user message accepted by the chat endpoints, in characters
+MAX_MESSAGE_LENGTH = 10000
+
+# Largest page size accepted by the history endpoints' limit parameter
+MAX_LIMIT = 200
+
+# Server-Sent Events framing, built once instead of per streamed chunk
+SSE_PREFIX = b'data: '
+SSE_SUFFIX = b'\n\n'
+SSE_DONE_FRAME = SSE_PREFIX + orjson.dumps({'done': True}) + SSE_SUFFIX
+
+# Small model chunks are coalesced into one SSE frame: text is held until it reaches
+# SSE_COALESCE_CHARS, but never longer than SSE_COALESCE_SECONDS after it arrived
+SSE_COALESCE_CHARS = 64
+SSE_COALESCE_SECONDS = 0.05
+
 # Database configuration
 DB_PATH = 'chat_history.db'
+DB_POOL_SIZE = 8  # Roughly one connection per Flask worker thread
+MAX_ROW_ID = 2**63 - 1  # Largest SQLite rowid, used as the "newest" history cursor
+
+# Request-path SQL, kept together so the queries and the indexes they rely on are easy to review
+SQL_INSERT_MSG = 'INSERT INTO conversations (session_id, role, message) VALUES (?, ?, ?)'
+SQL_UPSERT_SESSION = '''INSERT INTO sessions (session_id, title, last_message_time)
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(session_id) DO UPDATE SET
+                            title = COALESCE(sessions.title, excluded.title),
+                            last_message_time = excluded.last_message_time'''
+# Inner query picks the newest page; outer query returns it oldest first
+SQL_SELECT_HISTORY = '''SELECT id, role, message, timestamp FROM
+                            (SELECT id, role, message, timestamp FROM conversations
+                             WHERE session_id = ? AND id < ?
+                             ORDER BY id DESC LIMIT ?)
+                        ORDER BY id ASC'''
+# Titles and activity times are cached in the sessions table by save_message()
+SQL_SELECT_SESSIONS = '''SELECT session_id, last_message_time, title FROM sessions
+                         ORDER BY last_message_time DESC LIMIT ?'''
+SQL_DELETE_SESSION_MESSAGES = 'DELETE FROM conversations WHERE session_id = ?'
+SQL_DELETE_SESSION = 'DELETE FROM sessions WHERE session_id = ?'
+SQL_SELECT_LAST_ID = 'SELECT MAX(id) FROM conversations WHERE session_id = ?'
+
+# Pool of reusable SQLite connections, filled per process by init_db_pool()
+_conn_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+# Short-lived cache of /history/sessions results keyed by limit; cleared on every write.
+# The generation counter stops a slow read from caching data older than a write.
+SESSIONS_CACHE_TTL = 2.0  # seconds
+_sessions_cache = {'data': {}, 'generation': 0}
+_cache_lock = threading.Lock()
+
+# Messages waiting for the background writer, which group-commits them in batches.
+# Every queued write gets a sequence number; readers wait for the number current
+# when they were called, not for the queue to drain.
+WRITE_BATCH_SIZE = 500  # Max rows per transaction
+_write_queue = queue.Queue()
+_write_state = {'queued': 0, 'written': 0}
+_write_cond = threading.Condition()
+
+# The pool and writer thread are started on first use in each process, never at
+# import: SQLite connections and threads don't survive a fork (e.g. Gunicorn --preload)
+_started = {'pid': None}
+_start_lock = threading.Lock()
 
 def init_db():
     """
     Initialize the SQLite database and create conversations table if it doesn't exist.
 
-    Creates a table to store chat messages with session tracking and timestamps.
+    Creates a table to store chat messages with session tracking and timestamps,
+    plus a sessions table caching each session's title and last activity time.
+    Switches the database to WAL journaling so reads don't block on writes.
     """
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+    # WAL mode is persistent in the database file, so it only needs setting once
+    c.execute('PRAGMA journal_mode=WAL')
     c.execute('''CREATE TABLE IF NOT EXISTS conversations
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   session_id TEXT,
                   role TEXT,
                   message TEXT,
                   timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+    # Per-session history reads (walked backwards by id for keyset pagination),
+    # deletes, and the one-time title backfill below
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_session_id
+                 ON conversations(session_id, id)''')
+    # Per-session metadata, maintained by save_message() so the sidebar never
+    # has to re-derive titles from the conversations table
+    c.execute('''CREATE TABLE IF NOT EXISTS sessions
+                 (session_id TEXT PRIMARY KEY,
+                  title TEXT,
+                  last_message_time DATETIME)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_sessions_last_message_time
+                 ON sessions(last_message_time)''')
+    # Backfill metadata for databases created before the sessions table existed
+    c.execute('SELECT 1 FROM sessions LIMIT 1')
+    if c.fetchone() is None:
+        c.execute('''
+            INSERT INTO sessions (session_id, title, last_message_time)
+            SELECT
+                session_id,
+                (SELECT message FROM conversations c2
+                 WHERE c2.session_id = s.session_id AND c2.role = 'user'
+                 ORDER BY c2.id ASC LIMIT 1),
+                last_message_time
+            FROM (SELECT session_id, MAX(timestamp) as last_message_time
+                  FROM conversations
+                  GROUP BY session_id) s
+        ''')
     conn.commit()
     conn.close()
 
-# Initialize database on application startup
+def _create_connection():
+    """
+    Open a new SQLite connection suitable for sharing across request threads.
+
+    Per-connection PRAGMAs are applied here since SQLite does not persist them.
+
+    Returns:
+        sqlite3.Connection: Autocommit connection usable from any thread
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    # NORMAL sync is safe under WAL and avoids an fsync on every commit
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    conn.execute('PRAGMA cache_size=-64000')  # ~64 MB page cache
+    return conn
+
+def init_db_pool():
+    """
+    Pre-open DB_POOL_SIZE connections so requests never pay connection setup cost.
+    """
+    global _conn_pool
+    _conn_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+    for _ in range(DB_POOL_SIZE):
+        _conn_pool.put(_create_connection())
+
+def _ensure_started():
+    """
+    Open the connection pool and start the background writer in this process.
+
+    Runs once per process, on the first database access. A process forked after
+    startup (e.g. a Gunicorn worker with --preload) gets its own pool, write queue
+    and writer thread instead of the parent's, which it can't use.
+    """
+    global _write_queue, _write_cond
+    pid = os.getpid()
+    if _started['pid'] == pid:
+        return
+    with _start_lock:
+        if _started['pid'] == pid:
+            return
+        init_db_pool()
+        _write_queue = queue.Queue()
+        _write_cond = threading.Condition()
+        _write_state['queued'] = _write_state['written'] = 0
+        threading.Thread(target=_writer_loop, name='db-writer', daemon=True).start()
+        _started['pid'] = pid
+
+@contextmanager
+def get_conn():
+    """
+    Borrow a connection from the pool for the duration of a with-block.
+
+    Blocks until a connection is free and always returns it to the pool on exit.
+
+    Yields:
+        sqlite3.Connection: A pooled database connection
+    """
+    _ensure_started()
+    conn = _conn_pool.get()
+    try:
+        yield conn
+    finally:
+        _conn_pool.put(conn)
+
+def flush_writes(seq=None):
+    """
+    Block until queued messages have been written.
+
+    Args:
+        seq (int): Sequence number of the write to wait for (default: the newest
+            write queued so far). Writes queued after this call are not waited on.
+    """
+    if _started['pid'] != os.getpid():
+        return  # Nothing has been queued in this process
+    with _write_cond:
+        if seq is None:
+            seq = _write_state['queued']
+        _write_cond.wait_for(lambda: _write_state['written'] >= seq)
+
+def _writer_loop():
+    """
+    Background writer: drain queued messages and commit them in batches.
+
+    Each save_messages() call is one queue item, so a request's messages always
+    land in the same transaction. Up to WRITE_BATCH_SIZE rows share one commit.
+    The writer has its own connection, so requests holding pooled connections
+    can never stall it.
+    """
+    conn = _create_connection()
+    while True:
+        writes = [_write_queue.get()]
+        row_count = len(writes[0]['messages'])
+        while row_count < WRITE_BATCH_SIZE:
+            try:
+                write = _write_queue.get_nowait()
+            except queue.Empty:
+                break
+            writes.append(write)
+            row_count += len(write['messages'])
+        try:
+            _write_batch(conn, writes)
+        finally:
+            with _write_cond:
+                _write_state['written'] = writes[-1]['seq']
+                _write_cond.notify_all()
+
+def _write_batch(conn, writes):
+    """
+    Commit a batch of queued writes, isolating failures to the write that caused them.
+
+    The whole batch is tried as one transaction first. If that fails, each write
+    is retried in its own transaction, so one bad row can't discard other
+    requests' messages.
+
+    Args:
+        conn (sqlite3.Connection): The writer thread's connection
+        writes (list): Writes queued by save_messages(), in queue order
+    """
+    try:
+        _write_messages(conn, writes)
+        return
+    except Exception as e:
+        if len(writes) == 1:
+            print(f"Error saving message to database: {e}")
+            return
+    for write in writes:
+        try:
+            _write_messages(conn, [write])
+        except Exception as e:
+            print(f"Error saving message to database: {e}")
+
+# Initialize the database on application startup; the connection pool and
+# background writer start lazily in each process (see _ensure_started())
 init_db()
+# Messages are saved asynchronously, so write out anything still queued on shutdown
+atexit.register(flush_writes)
+
+def _load_recent(session_id):
+    """
+    Load a session's most recent messages in Gemini chat history format.
+
+    Args:
+        session_id (str): Chat session identifier
+
+    Returns:
+        tuple: (history, last_id) where history is up to CHAT_HISTORY_MESSAGES
+        {'role': ..., 'parts': [...]} dicts, oldest first, and last_id is the
+        session's newest message id (None for an empty session)
+    """
+    flush_writes()
+    with get_conn() as conn:
+        rows = conn.execute(SQL_SELECT_HISTORY,
+                            (session_id, MAX_ROW_ID, CHAT_HISTORY_MESSAGES)).fetchall()
+    history = [{'role': 'user' if role == 'user' else 'model', 'parts': [message]}
+               for _, role, message, _ in rows if message]
+    return history, rows[-1][0] if rows else None
+
+def _get_chat_entry(session_id):
+    """
+    Return the session's cache entry, rebuilding it if the database has moved on.
+
+    The cached chat is reused only while the session's newest message id still
+    matches the one it was built from plus this process's own writes, so clears
+    and turns handled by other worker processes are picked up. Must be called
+    with the session's lock held.
+
+    Args:
+        session_id (str): Chat session identifier
+
+    Returns:
+        dict: {'chat': ChatSession, 'last_id': int | None, 'write': dict | None}
+    """
+    with _chats_lock:
+        entry = _chats.get(session_id)
+    if entry is not None:
+        if entry['write'] is not None:
+            # Our own last exchange must be in the database before comparing ids
+            flush_writes(entry['write']['seq'])
+            entry['last_id'] = entry['write']['last_id']
+            entry['write'] = None
+        with get_conn() as conn:
+            newest_id = conn.execute(SQL_SELECT_LAST_ID, (session_id,)).fetchone()[0]
+        if newest_id is not None and newest_id == entry['last_id']:
+            return entry
+
+    history, last_id = _load_recent(session_id)
+    chat = model.start_chat(history=history)
+    trim_chat_session(chat)
+    entry = {'chat': chat, 'last_id': last_id, 'write': None}
+    with _chats_lock:
+        _chats[session_id] = entry
+    return entry
+
+@contextmanager
+def chat_session(session_id):
+    """
+    Hold a session's lock and yield its up-to-date Gemini chat cache entry.
+
+    Send, read and trim the reply inside the with-block, and store the write
+    returned by save_messages() for the exchange in entry['write']. Enter this
+    before queuing the new user message, so it isn't loaded into the history twice.
+    If the block fails or is abandoned, the chat is discarded, since an unfinished
+    reply leaves it unable to take further messages.
+
+    Args:
+        session_id (str): Chat session identifier
+
+    Yields:
+        dict: {'chat': ChatSession, 'last_id': int | None, 'write': dict | None}
+    """
+    with _chats_lock:
+        lock = _chat_locks.get(session_id)
+        if lock is None:
+            lock = _chat_locks[session_id] = threading.Lock()
+    with lock:
+        entry = _get_chat_entry(session_id)
+        try:
+            yield entry
+        except BaseException:
+            discard_chat_session(session_id)
+            raise
+
+def trim_chat_session(chat):
+    """
+    Keep a chat's context to the last CHAT_HISTORY_MESSAGES messages.
+
+    Gemini chats resend their whole history with every message, so this bounds
+    the tokens sent per request for long conversations. Leading model turns are
+    dropped as well, because Gemini expects the conversation to open with a user turn.
+    """
+    history = chat.history[-CHAT_HISTORY_MESSAGES:]
+    while history and history[0].role != 'user':
+        history.pop(0)
+    if len(history) != len(chat.history):
+        chat.history = history
+
+def discard_chat_session(session_id):
+    """
+    Drop a session's cached Gemini chat, e.g. after its history is cleared or a reply fails.
+    """
+    with _chats_lock:
+        _chats.pop(session_id, None)
+
+def coalesce_text(response):
+    """
+    Re-chunk a streaming Gemini response into fewer, larger pieces of text.
+
+    The first text is passed on immediately. After that, text is buffered until
+    SSE_COALESCE_CHARS have built up or SSE_COALESCE_SECONDS have passed since the
+    oldest buffered text arrived, whichever comes first. The response is read on a
+    helper thread, so buffered text never waits for the next upstream chunk. When
+    the consumer stops early (e.g. the client disconnects), the helper stops
+    reading from Gemini at the next chunk.
+
+    Args:
+        response: Iterable of Gemini response chunks
+
+    Yields:
+        str: Text ready to send to the client
+
+    Raises:
+        Exception: Any error from reading the response, after buffered text is yielded
+    """
+    chunks = queue.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def read_response():
+        upstream = iter(response)
+        try:
+            for chunk in upstream:
+                if stop.is_set():
+                    break
+                if chunk.text:
+                    chunks.put(chunk.text)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            # Close the upstream iterator so an abandoned stream stops pulling from Gemini
+            close = getattr(upstream, 'close', None)
+            if close is not None:
+                close()
+        chunks.put(done)
+
+    threading.Thread(target=read_response, name='gemini-stream', daemon=True).start()
+
+    buf = ''
+    deadline = None  # When the buffered text must be sent
+    first = True
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                item = chunks.get(timeout=timeout)
+            except queue.Empty:
+                yield buf
+                buf = ''
+                deadline = None
+                continue
+            if item is done or isinstance(item, Exception):
+                if buf:
+                    yield buf
+                if item is done:
+                    return
+                raise item
+            buf += item
+            if first or len(buf) >= SSE_COALESCE_CHARS:
+                yield buf
+                buf = ''
+                deadline = None
+                first = False
+            elif deadline is None:
+                deadline = time.monotonic() + SSE_COALESCE_SECONDS
+    finally:
+        stop.set()
+
+def _jsonify(obj, status=200):
+    """
+    Build a JSON response using orjson instead of Flask's stdlib-based jsonify.
+
+    Args:
+        obj: JSON-serializable object for the response body
+        status (int): HTTP status code (default: 200)
+
+    Returns:
+        Response: application/json response
+    """
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+def _parse_chat_request():
+    """
+    Read and validate the JSON body of a chat request.
+
+    Rejects non-text, empty or oversized input before it reaches the model or database.
+
+    Returns:
+        tuple: (session_id, user_message, error), where error is a JSON error
+        response to return as-is, or None if the request is valid
+    """
+    data = request.get_json()
+    user_message = data.get('message') or ''
+    session_id = data.get('session_id', 'default')
+
+    if not isinstance(session_id, str):
+        return None, None, _jsonify({'error': 'Session ID must be a string'}, 400)
+    if not isinstance(user_message, str):
+        return None, None, _jsonify({'error': 'Message must be a string'}, 400)
+    user_message = user_message.strip()
+    if not user_message:
+        return None, None, _jsonify({'error': 'Message is required'}, 400)
+    if len(user_message) > MAX_MESSAGE_LENGTH:
+        return None, None, _jsonify({'error': 'Message is too long'}, 413)
+    return session_id, user_message, None
 
 @app.route('/')
 def index():
@@ -70,40 +530,47 @@ def chat():
     Handle non-streaming chat requests.
 
     Receives a JSON payload with user message and session ID, generates AI response
-    using Google Gemini, and stores conversation history in database.
+    using Google Gemini, and stores conversation history in database. Clients that
+    send "Accept: text/event-stream" are served by chat_stream() instead.
 
     Request JSON:
         {
-            "message": str,  # User message (required)
+            "message": str,  # User message (required, non-blank, max MAX_MESSAGE_LENGTH chars)
             "session_id": str  # Chat session identifier (optional, default: 'default')
         }
 
     Returns:
         JSON response with AI generated response or error message
     """
+    # Let streaming-capable clients receive text as it is generated
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        return chat_stream()
+
     try:
-        data = request.get_json()
-        user_message = data.get('message', '')
-        session_id = data.get('session_id', 'default')
+        session_id, user_message, error = _parse_chat_request()
+        if error:
+            return error
 
-        if not user_message:
-            return jsonify({'error': 'Message is required'}), 400
+        with chat_session(session_id) as entry:
+            chat = entry['chat']
 
-        # Store user message in database for conversation history
-        save_message(session_id, 'user', user_message)
+            # Store user message in database for conversation history
+            save_message(session_id, 'user', user_message)
 
-        # Generate AI response using Google Gemini model
-        response = model.generate_content(user_message)
-        bot_response = response.text.strip()
+            # Generate AI response using the session's Gemini chat, streaming internally
+            # so the reply is assembled while the model is still generating it
+            response = chat.send_message(user_message, stream=True)
+            bot_response = ''.join(chunk.text for chunk in response).strip()
+            trim_chat_session(chat)
 
-        # Store AI response in database
-        save_message(session_id, 'bot', bot_response)
+            # Store AI response in database
+            entry['write'] = save_message(session_id, 'bot', bot_response)
 
-        return jsonify({'response': bot_response})
+        return _jsonify({'response': bot_response})
 
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _jsonify({'error': 'Internal server error'}, 500)
 
 @app.route('/chat/stream', methods=['POST'])
 def chat_stream():
@@ -115,7 +582,7 @@ def chat_stream():
 
     Request JSON:
         {
-            "message": str,  # User message (required)
+            "message": str,  # User message (required, non-blank, max MAX_MESSAGE_LENGTH chars)
             "session_id": str  # Chat session identifier (optional, default: 'default')
         }
 
@@ -123,39 +590,48 @@ def chat_stream():
         SSE formatted data with streaming text chunks and completion signal
     """
     try:
-        data = request.get_json()
-        user_message = data.get('message', '')
-        session_id = data.get('session_id', 'default')
-
-        if not user_message:
-            return jsonify({'error': 'Message is required'}), 400
-
-        # Store user message in database before generating response
-        save_message(session_id, 'user', user_message)
+        session_id, user_message, error = _parse_chat_request()
+        if error:
+            return error
 
         def generate():
             """Generator function for streaming AI response."""
+            # User and bot messages are written together once the stream ends,
+            # so the response starts streaming without waiting on the database
+            pending = [(session_id, 'user', user_message)]
+            parts = []
             try:
-                # Generate streaming response from Gemini AI
-                response = model.generate_content(user_message, stream=True)
-
-                full_response = ""
-                # Stream each text chunk as it arrives
-                for chunk in response:
-                    if chunk.text:
-                        full_response += chunk.text
-                        yield f"data: {json.dumps({'text': chunk.text})}\n\n"
-
-                # Save complete response to database and signal completion
-                save_message(session_id, 'bot', full_response)
-                yield f"data: {json.dumps({'done': True})}\n\n"
+                # Generate streaming response from the session's Gemini chat
+                with chat_session(session_id) as entry:
+                    chat = entry['chat']
+                    response = chat.send_message(user_message, stream=True)
+
+                    # Emit chunks in slightly larger frames as they arrive
+                    for text in coalesce_text(response):
+                        parts.append(text)
+                        yield SSE_PREFIX + orjson.dumps({'text': text}) + SSE_SUFFIX
+
+                    # Save complete exchange to database and signal completion
+                    pending.append((session_id, 'bot', ''.join(parts)))
+                    entry['write'] = save_messages(pending)
+                    pending = []
+                    trim_chat_session(chat)
+                yield SSE_DONE_FRAME
 
             except Exception as e:
                 print(f"Streaming AI error: {e}")
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                yield SSE_PREFIX + orjson.dumps({'error': str(e)}) + SSE_SUFFIX
+
+            finally:
+                # Keep the user message even if generation failed or the client disconnected
+                # (chat_session() has already discarded the unfinished chat)
+                if pending:
+                    save_messages(pending)
 
+        # The generator only uses values captured above, so it doesn't need the
+        # request context pushed around every chunk (no stream_with_context)
         return Response(
-            stream_with_context(generate()),
+            generate(),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
@@ -165,43 +641,77 @@ def chat_stream():
 
     except Exception as e:
         print(f"Error in streaming endpoint: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return _jsonify({'error': 'Internal server error'}, 500)
 
 @app.route('/history', methods=['GET'])
 def get_history():
     """
     Retrieve chat history for a specific session.
 
+    Returns the most recent messages; older pages are fetched by passing the
+    previous response's next_cursor back as before_id (keyset pagination).
+
     Query parameters:
         session_id (str): Chat session identifier (default: 'default')
-        limit (int): Maximum number of messages to return (default: 50)
+        limit (int): Maximum number of messages to return (default: 50, clamped to 1-MAX_LIMIT)
+        before_id (int): Only return messages older than this message id (optional)
 
     Returns:
-        JSON: Array of message objects with role, message text, and timestamp
-        Response format: {'history': [{'role': str, 'message': str, 'timestamp': str}]}
+        JSON: Array of message objects with id, role, message text, and timestamp,
+        plus the cursor for the next (older) page, or null when there are no more
+        Response format: {'history': [{'id': int, 'role': str, 'message': str, 'timestamp': str}],
+                          'next_cursor': int | None}
     """
     try:
         session_id = request.args.get('session_id', 'default')
-        limit = request.args.get('limit', 50, type=int)
-
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''SELECT role, message, timestamp FROM conversations
-                     WHERE session_id = ?
-                     ORDER BY timestamp DESC LIMIT ?''', (session_id, limit))
-
-        rows = c.fetchall()
-        conn.close()
+        limit = min(max(1, request.args.get('limit', 50, type=int)), MAX_LIMIT)
+        # Default to the largest possible SQLite rowid, i.e. start from the newest message
+        before_id = request.args.get('before_id', MAX_ROW_ID, type=int)
 
-        # Reverse to show chronological order (oldest first)
-        history = [{'role': row[0], 'message': row[1], 'timestamp': row[2]}
-                   for row in reversed(rows)]
+        # Make sure messages queued by earlier requests are visible
+        flush_writes()
 
-        return jsonify({'history': history})
+        def generate():
+            """Generator function streaming the history JSON row by row."""
+            # The pooled connection is held for the whole stream and returned when
+            # the generator finishes or the response is closed
+            with get_conn() as conn:
+                c = conn.cursor()
+                c.arraysize = 100
+                c.execute(SQL_SELECT_HISTORY, (session_id, before_id, limit))
+                rows = c.fetchmany()
+                # Pause here until the view has checked that the query succeeded
+                yield None
+
+                yield b'{"history":['
+                count = 0
+                oldest_id = rows[0][0] if rows else None
+                while rows:
+                    for row in rows:
+                        item = orjson.dumps({'id': row[0], 'role': row[1],
+                                             'message': row[2], 'timestamp': row[3]})
+                        yield item if count == 0 else b',' + item
+                        count += 1
+                    try:
+                        rows = c.fetchmany()
+                    except Exception as e:
+                        # Headers are already sent; end the stream so the client sees invalid JSON
+                        print(f"Error streaming chat history: {e}")
+                        raise
+
+            # A full page means there may be older messages before the oldest one returned
+            next_cursor = oldest_id if count and count == limit else None
+            yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b'}'
+
+        # Run the query and read the first batch before sending headers, so database
+        # errors still become a 500 instead of a truncated or empty 200 response
+        body = generate()
+        next(body)
+        return Response(body, mimetype='application/json')
 
     except Exception as e:
         print(f"Error fetching chat history: {e}")
-        return jsonify({'error': 'Failed to fetch history'}), 500
+        return _jsonify({'error': 'Failed to fetch history'}, 500)
 
 @app.route('/history/sessions', methods=['GET'])
 def get_sessions():
@@ -212,44 +722,44 @@ def get_sessions():
     and the first user message as the session title.
 
     Query parameters:
-        limit (int): Maximum number of sessions to return (default: 50)
+        limit (int): Maximum number of sessions to return (default: 50, clamped to 1-MAX_LIMIT)
 
     Returns:
         JSON: Array of session objects showing recent chat sessions
         Response format: {'sessions': [{'id': str, 'last_message_time': str, 'title': str}]}
     """
     try:
-        limit = request.args.get('limit', 50, type=int)
+        limit = min(max(1, request.args.get('limit', 50, type=int)), MAX_LIMIT)
 
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        # Get distinct sessions with their latest message timestamp and first message as title
-        # Subquery gets the first user message for each session as the title
-        c.execute('''
-            SELECT
-                session_id,
-                MAX(timestamp) as last_message_time,
-                (SELECT message FROM conversations c2
-                 WHERE c2.session_id = c1.session_id AND c2.role = 'user'
-                 ORDER BY timestamp ASC LIMIT 1) as title
-            FROM conversations c1
-            GROUP BY session_id
-            ORDER BY last_message_time DESC
-            LIMIT ?
-        ''', (limit,))
+        # Make sure messages queued by earlier requests are visible
+        flush_writes()
+
+        with _cache_lock:
+            cached = _sessions_cache['data'].get(limit)
+            generation = _sessions_cache['generation']
+        if cached and time.time() - cached[0] < SESSIONS_CACHE_TTL:
+            return Response(cached[1], mimetype='application/json')
 
-        rows = c.fetchall()
-        conn.close()
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute(SQL_SELECT_SESSIONS, (limit,))
+            rows = c.fetchall()
 
         # Format sessions with truncated titles
         sessions = [{'id': row[0], 'last_message_time': row[1], 'title': row[2][:50] + '...' if row[2] and len(row[2]) > 50 else row[2] or 'Untitled Chat'}
                     for row in rows]
 
-        return jsonify({'sessions': sessions})
+        # Cache the serialized body so cache hits skip JSON encoding entirely
+        body = orjson.dumps({'sessions': sessions})
+        with _cache_lock:
+            if _sessions_cache['generation'] == generation:
+                _sessions_cache['data'][limit] = (time.time(), body)
+
+        return Response(body, mimetype='application/json')
 
     except Exception as e:
         print(f"Error fetching chat sessions: {e}")
-        return jsonify({'error': 'Failed to fetch sessions'}), 500
+        return _jsonify({'error': 'Failed to fetch sessions'}, 500)
 
 @app.route('/history/clear', methods=['POST'])
 def clear_history():
@@ -266,17 +776,28 @@ def clear_history():
         data = request.get_json()
         session_id = data.get('session_id', 'default')
 
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('DELETE FROM conversations WHERE session_id = ?', (session_id,))
-        conn.commit()
-        conn.close()
+        # Let queued messages land first so they can't reappear after the delete
+        flush_writes()
+
+        with get_conn() as conn:
+            conn.execute(SQL_DELETE_SESSION_MESSAGES, (session_id,))
+            conn.execute(SQL_DELETE_SESSION, (session_id,))
+        invalidate_sessions_cache()
+        discard_chat_session(session_id)
 
-        return jsonify({'success': True})
+        return _jsonify({'success': True})
 
     except Exception as e:
         print(f"Error clearing chat history: {e}")
-        return jsonify({'error': 'Failed to clear history'}), 500
+        return _jsonify({'error': 'Failed to clear history'}, 500)
+
+def invalidate_sessions_cache():
+    """
+    Drop all cached /history/sessions results after the underlying data changes.
+    """
+    with _cache_lock:
+        _sessions_cache['data'] = {}
+        _sessions_cache['generation'] += 1
 
 def save_message(session_id, role, message):
     """
@@ -289,16 +810,61 @@ def save_message(session_id, role, message):
 
     This function stores conversation history persistently in SQLite database
     with automatic timestamps via the database default.
+
+    Returns:
+        dict: The queued write (see save_messages())
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('INSERT INTO conversations (session_id, role, message) VALUES (?, ?, ?)',
-                  (session_id, role, message))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error saving message to database: {e}")
+    return save_messages([(session_id, role, message)])
+
+def save_messages(messages):
+    """
+    Queue several chat messages to be saved together in a single transaction.
+
+    Args:
+        messages (list): (session_id, role, message) tuples, in conversation order
+
+    Returns immediately; the background writer commits the messages, grouped
+    with any others queued concurrently. Pass the returned write's 'seq' to
+    flush_writes() to wait for them.
 
-if __name__ == '__main__':
-    app.run(debug=True)
+    Returns:
+        dict: The queued write: {'messages': list, 'seq': int, 'last_id': int | None},
+        where 'last_id' is set to the id of its newest row once written
+    """
+    _ensure_started()
+    write = {'messages': list(messages), 'seq': None, 'last_id': None}
+    # Numbered and queued under the lock so queue order matches sequence order
+    with _write_cond:
+        _write_state['queued'] += 1
+        write['seq'] = _write_state['queued']
+        _write_queue.put(write)
+    return write
+
+def _write_messages(conn, writes):
+    """
+    Write queued chat messages to the database in a single transaction.
+
+    Args:
+        conn (sqlite3.Connection): The writer thread's connection
+        writes (list): Writes queued by save_messages(), in queue order
+
+    Also keeps each session's cached metadata current; the first user message
+    becomes the session title. Each write's 'last_id' is filled in on success.
+
+    Raises:
+        sqlite3.Error: If any row fails; the whole transaction is rolled back
+    """
+    messages = [row for write in writes for row in write['messages']]
+    with conn:  # Commits on success, rolls back on error
+        conn.execute('BEGIN')
+        conn.executemany(SQL_INSERT_MSG, messages)
+        # The transaction holds the write lock, so the rows got consecutive ids
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        conn.executemany(SQL_UPSERT_SESSION,
+                         [(session_id, message if role == 'user' else None)
+                          for session_id, role, message in messages])
+    row_id = last_id - len(messages)
+    for write in writes:
+        row_id += len(write['messages'])
+        write['last_id'] = row_id
+    invalidate_sessions_cache()
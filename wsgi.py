@@ -0,0 +1,17 @@
+"""
+PirizGPT WSGI Entry Point
+
+Exposes the Flask application for production WSGI servers. Run with a threaded
+Gunicorn worker so requests share the SQLite connection pool, e.g.:
+
+    gunicorn -k gthread --threads 8 -w 2 wsgi:app
+
+Each worker opens its own connection pool and database writer on first use, so
+--preload is safe too.
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    # Local development only; use Gunicorn (see above) for production
+    app.run(threaded=True)